@@ -0,0 +1,47 @@
+"""
+Prompt context size and formatting cost as a session grows.
+
+Adds turns to a MemoryModule and, at checkpoints, reports the estimated
+tokens of the full transcript (what prompts used to include) against the
+budgeted context now used in prompts, plus the cost of each call.
+
+Usage:
+    python -m benchmarks.bench_context_size [--turns 5000]
+"""
+import argparse
+import time
+
+from src.agents.context import estimate_tokens
+from src.agents.memory import MemoryModule
+from src.utils.fake_llm import FakeChatModel
+
+QUERY = "Can you recommend a lightweight laptop for travel under $1000?"
+RESPONSE = "Here are a few lightweight laptops that fit your budget and travel needs. " * 3
+
+
+def time_call(func, repeats=50):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=5000)
+    args = parser.parse_args()
+
+    memory = MemoryModule(FakeChatModel(response="Shopper is looking for a travel laptop."))
+    checkpoints = {10, 100, 1000, args.turns}
+    print(f"{'turns':>8} {'full tokens':>12} {'context tokens':>15} {'context us':>11}")
+    for turn in range(1, args.turns + 1):
+        memory.add_to_history(QUERY, RESPONSE)
+        if turn in checkpoints:
+            memory.context.wait()
+            full = estimate_tokens(memory.get_history())
+            context = estimate_tokens(memory.get_context())
+            print(f"{turn:>8} {full:>12} {context:>15} {time_call(memory.get_context):>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Latency of a cached reasoning call versus an uncached one.
+
+Usage:
+    python -m benchmarks.bench_llm_cache [--latency 0.05] [--calls 2000]
+"""
+import argparse
+import time
+
+from src.agents import chains
+from src.agents.llm_cache import LLMResponseCache, SemanticCache
+from src.agents.memory import MemoryModule
+from src.utils.fake_llm import FakeChatModel
+
+
+def per_call_us(func, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    memory = MemoryModule(FakeChatModel(response="A laptop.", latency=args.latency))
+    chain = memory.llm_chain
+    inputs = {"query": "Can you recommend a laptop?", "history": ""}
+
+    chains.set_response_cache(None)
+    uncached = per_call_us(lambda: chains.run_chain(chain, inputs, site="bench"), 10)
+
+    for name, cache in (("exact", LLMResponseCache()),
+                        ("exact+semantic", LLMResponseCache(semantic=SemanticCache(0.9)))):
+        chains.set_response_cache(cache)
+        chains.run_chain(chain, inputs, site="bench")
+        hit = per_call_us(lambda: chains.run_chain(chain, inputs, site="bench"), args.calls)
+        near = dict(inputs, query="can you recommend a laptop")
+        near_hit = per_call_us(lambda: chains.run_chain(chain, near, site="bench"), 10)
+        print(f"{name:>15}: uncached {uncached:10.1f} us  exact hit {hit:8.1f} us  "
+              f"near-duplicate {near_hit:10.1f} us  stats {cache.stats()['bench']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Load test for POST /query against the offline fake chat model.
+
+Runs the /query handler at increasing concurrency and reports throughput.
+Because every LLM call is awaited, throughput should grow with concurrency
+instead of staying flat at roughly one request per pipeline latency.
+
+Usage:
+    python -m benchmarks.bench_query_concurrency [--latency 0.05] [--requests 64]
+"""
+import argparse
+import asyncio
+import time
+
+from src.agents import chains
+from src.api import main_api
+from src.utils.fake_llm import FakeChatModel
+
+
+async def run_level(concurrency, total_requests):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            req = main_api.QueryRequest(user_id=f"bench-{i % concurrency}", query="Can you recommend a laptop?")
+            await main_api.process_query(req)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total_requests)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per LLM call.")
+    parser.add_argument("--requests", type=int, default=64, help="Requests per concurrency level.")
+    args = parser.parse_args()
+
+    fake = FakeChatModel(response="recommendation", latency=args.latency)
+    chains.set_llm(fake)
+
+    print(f"{'concurrency':>12} {'seconds':>10} {'req/s':>10}")
+    for concurrency in (1, 4, 16, 64):
+        main_api.user_sessions.clear()
+        elapsed = asyncio.run(run_level(concurrency, args.requests))
+        print(f"{concurrency:>12} {elapsed:>10.3f} {args.requests / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+New-user cost: time and memory to create a session.
+
+Compares today's UserSession, which only holds per-user state, with the old
+layout that built two LLMChains and a zero-shot-react agent per session.
+
+Usage:
+    python -m benchmarks.bench_session_creation [--sessions 200]
+"""
+import argparse
+import time
+import tracemalloc
+
+from langchain.agents import initialize_agent
+from langchain.chains.llm import LLMChain
+
+from src.agents import chains
+from src.api.main_api import UserSession
+from src.utils.fake_llm import FakeChatModel
+from src.utils.helpers import fetch_product_data_tool
+
+
+def legacy_session(llm):
+    """The per-session objects UserSession used to build."""
+    return (
+        LLMChain(llm=llm, prompt=chains.REASONING_PROMPT),
+        initialize_agent(tools=[fetch_product_data_tool()], llm=llm, agent="zero-shot-react-description"),
+        FakeChatModel(),  # stands in for the per-session ChatOpenAI client
+        LLMChain(llm=llm, prompt=chains.PLANNING_PROMPT),
+        LLMChain(llm=llm, prompt=chains.REASONING_PROMPT),
+    )
+
+
+def measure(factory, count):
+    tracemalloc.start()
+    start = time.perf_counter()
+    sessions = [factory() for _ in range(count)]
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(sessions) == count
+    return elapsed / count * 1e6, current / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=200)
+    args = parser.parse_args()
+
+    llm = FakeChatModel()
+    chains.set_llm(llm)
+    # Warm the shared components so only per-session cost is measured.
+    UserSession().memory.agent
+
+    print(f"{'variant':>10} {'us/session':>12} {'bytes/session':>14}")
+    for name, factory in (("legacy", lambda: legacy_session(llm)), ("shared", UserSession)):
+        us, size = measure(factory, args.sessions)
+        print(f"{name:>10} {us:>12.1f} {size:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Rehydration latency of an evicted session against its history length.
+
+Writes sessions with growing histories to a SQLite backend, flushes them, and
+times loading each one back into a fresh session through the SessionStore.
+
+Usage:
+    python -m benchmarks.bench_session_rehydration [--repeats 20]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from src.agents import chains
+from src.api.main_api import UserSession
+from src.api.persistence import SQLiteBackend
+from src.api.session_store import SessionStore
+from src.utils.fake_llm import FakeChatModel
+
+TURN_QUERY = "Can you recommend a lightweight laptop for travel under $1000?"
+TURN_RESPONSE = "Here are a few lightweight laptops that fit your budget and travel needs. " * 3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    chains.set_llm(FakeChatModel())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteBackend(os.path.join(tmp, "sessions.db"), flush_interval=60)
+        lengths = (10, 100, 1000, 10000)
+        for turns in lengths:
+            session = UserSession()
+            for _ in range(turns):
+                session.memory.add_to_history(TURN_QUERY, TURN_RESPONSE)
+            backend.save(f"user-{turns}", session.snapshot())
+        start = time.perf_counter()
+        backend.flush()
+        print(f"flushed {len(lengths)} sessions in {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+        print(f"{'turns':>8} {'p50 ms':>10} {'max ms':>10}")
+        for turns in lengths:
+            samples = []
+            for _ in range(args.repeats):
+                store = SessionStore(factory=UserSession, backend=backend)
+                start = time.perf_counter()
+                store.get(f"user-{turns}")
+                samples.append((time.perf_counter() - start) * 1e3)
+            print(f"{turns:>8} {statistics.median(samples):>10.3f} {max(samples):>10.3f}")
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
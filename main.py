@@ -1,17 +1,17 @@
-from langchain.chat_models import ChatOpenAI  # Updated import for ChatOpenAI
+from src.agents import chains
 from src.agents.memory import MemoryModule
 from src.agents.action import ActionModule
 from src.agents.profiling import ProfilingModule
 from src.agents.planning import PlanningModule
 
 def main():
-    # Initialize the LLM instance first.
-    llm = ChatOpenAI(model="gpt-4o")  # Replace with your preferred model
+    # Initialize the LLM instance first (shared by every module).
+    llm = chains.get_llm()  # Model is configured in src/agents/chains.py
 
     # Initialize modules with the LLM instance where needed.
     memory = MemoryModule(llm)
     profiling = ProfilingModule()
-    planning = PlanningModule(memory=memory, profiling=profiling)
+    planning = PlanningModule(memory=memory, profiling=profiling, llm=llm)
     action_module = ActionModule(memory, llm)
 
     # Example usage: obtain user query from input or preset.
@@ -1,22 +1,22 @@
-from langchain.chains.llm import LLMChain
-from langchain.prompts import PromptTemplate
+from src.agents import chains
 from src.utils.helpers import fetch_product_data  # Ensure this is imported
 
 class ActionModule:
     def __init__(self, memory, llm):
         self.memory = memory
-        self.llm_chain = LLMChain(
-            llm=llm,
-            prompt=PromptTemplate(
-                input_variables=["query", "history"],
-                template="User query: {query}\nConversation history: {history}\nReason about the query and respond appropriately."
-            )
-        )
+        self.llm = llm
+
+    @property
+    def llm_chain(self):
+        # Same prompt as the MemoryModule's reasoning chain, so both share one chain.
+        return chains.reasoning_chain(self.llm)
 
     def execute(self, plan, query=None):
         if plan == "reasoning":
-            history = self.memory.get_history()
-            response = self.llm_chain.run({"query": query, "history": history})
+            history = self.memory.get_context()
+            response = chains.run_chain(
+                self.llm_chain, {"query": query, "history": history}, site="action.reasoning"
+            )
             self.memory.add_to_history(query, response)
             return response
 
@@ -36,5 +36,47 @@ class ActionModule:
                 return "No conversation history found."
             return f"Here is your conversation history: {history}"
 
+        if plan == "dynamic_tool":
+            # The tool-using agent lives in the MemoryModule.
+            return self.memory.execute(plan, query)
+
         # Default response for general queries
-        return "How can I assist you further?"
\ No newline at end of file
+        return "How can I assist you further?"
+
+    async def aexecute(self, plan, query=None):
+        """
+        Async variant of execute for use from the API's event loop.
+        """
+        if plan == "reasoning":
+            history = self.memory.get_context()
+            response = await chains.arun_chain(
+                self.llm_chain, {"query": query, "history": history}, site="action.reasoning"
+            )
+            self.memory.add_to_history(query, response)
+            return response
+
+        if plan == "dynamic_tool":
+            return await self.memory.aexecute(plan, query)
+
+        return self.execute(plan, query)
+
+    async def astream(self, plan, query=None):
+        """
+        Yield the response for a plan in chunks as it is produced.
+
+        Reasoning streams LLM tokens and records the full answer in memory once
+        the stream ends; other plans yield their whole response at once.
+        """
+        if plan == "reasoning":
+            history = self.memory.get_context()
+            chain = chains.streaming_reasoning_chain(self.llm)
+            tokens = []
+            async for token in chains.astream_chain(
+                chain, {"query": query, "history": history}, site="action.reasoning"
+            ):
+                tokens.append(token)
+                yield token
+            self.memory.add_to_history(query, "".join(tokens))
+            return
+
+        yield await self.aexecute(plan, query)
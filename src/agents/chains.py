@@ -0,0 +1,288 @@
+"""
+Process-wide LLM client, prompts, chains and agents.
+
+Chains and agents hold no per-user state, so every session shares the same
+objects instead of rebuilding them. Sessions only keep their own memory and
+profile and look the shared components up on first use.
+
+All LLM calls go through run_chain/arun_chain and run_agent/arun_agent, which
+consult the response cache (src/agents/llm_cache.py) first.
+"""
+import asyncio
+import json
+import threading
+
+from langchain.callbacks.base import AsyncCallbackHandler
+from langchain.chains.llm import LLMChain
+from langchain.chat_models import ChatOpenAI
+from langchain.prompts import PromptTemplate
+from langchain.prompts.chat import ChatPromptTemplate, HumanMessagePromptTemplate
+
+from src.agents.llm_cache import LLMResponseCache
+
+DEFAULT_MODEL = "gpt-4o"
+
+REASONING_PROMPT = PromptTemplate(
+    input_variables=["query", "history"],
+    template=(
+        "User query: {query}\n"
+        "Conversation history: {history}\n"
+        "Reason about the query and respond appropriately."
+    )
+)
+
+PLANNING_PROMPT = ChatPromptTemplate.from_messages([
+    HumanMessagePromptTemplate.from_template(
+        "User query: {query}\n"
+        "Conversation history: {history}\n"
+        "User profile: {profile}\n"
+        "Based on the above information, decide the best plan. Options: reasoning, recommendation, history, dynamic_tool."
+    )
+])
+
+SUMMARY_PROMPT = PromptTemplate(
+    input_variables=["summary", "lines"],
+    template=(
+        "Progressively summarize the conversation between a shopper and a shopping assistant.\n"
+        "Keep products, preferences and constraints the shopper mentioned.\n"
+        "Current summary: {summary}\n"
+        "New lines of conversation:\n{lines}\n"
+        "New summary:"
+    )
+)
+
+_lock = threading.Lock()
+_llm = None
+# (kind, id(llm)) -> (llm, component); the llm reference keeps the id stable.
+_components = {}
+_http_session = None
+response_cache = LLMResponseCache.from_env()
+
+
+def get_llm():
+    """Return the shared chat model, creating it on first use."""
+    global _llm
+    if _llm is None:
+        with _lock:
+            if _llm is None:
+                _llm = ChatOpenAI(model=DEFAULT_MODEL)
+    return _llm
+
+
+def set_llm(llm):
+    """Replace the shared chat model (e.g. with a fake model in tests)."""
+    global _llm
+    with _lock:
+        _llm = llm
+
+
+def _shared(kind, llm, factory):
+    key = (kind, id(llm))
+    entry = _components.get(key)
+    if entry is None:
+        with _lock:
+            entry = _components.get(key)
+            if entry is None:
+                entry = (llm, factory())
+                _components[key] = entry
+    return entry[1]
+
+
+def reasoning_chain(llm):
+    """Shared chain answering a query given the conversation history."""
+    return _shared("reasoning", llm, lambda: LLMChain(llm=llm, prompt=REASONING_PROMPT))
+
+
+def planning_chain(llm):
+    """Shared chain choosing the plan for a query."""
+    return _shared("planning", llm, lambda: LLMChain(llm=llm, prompt=PLANNING_PROMPT))
+
+
+def streaming_llm(llm):
+    """Shared copy of the chat model that emits tokens as they arrive."""
+    if not hasattr(llm, "streaming"):
+        return llm
+    return _shared("streaming_llm", llm, lambda: llm.copy(update={"streaming": True}))
+
+
+def streaming_reasoning_chain(llm):
+    """Reasoning chain backed by the streaming copy of the model."""
+    return _shared(
+        "streaming_reasoning", llm,
+        lambda: LLMChain(llm=streaming_llm(llm), prompt=REASONING_PROMPT)
+    )
+
+
+def summary_chain(llm):
+    """Shared chain folding old conversation turns into a rolling summary."""
+    return _shared("summary", llm, lambda: LLMChain(llm=llm, prompt=SUMMARY_PROMPT))
+
+
+def tool_agent(llm):
+    """Shared zero-shot-react agent over the product tools."""
+    def build():
+        from langchain.agents import initialize_agent
+        from src.utils.helpers import fetch_product_data_tool
+        return initialize_agent(
+            tools=[fetch_product_data_tool()],
+            llm=llm,
+            agent="zero-shot-react-description",
+            verbose=True
+        )
+    return _shared("tool_agent", llm, build)
+
+
+def set_response_cache(cache):
+    """Replace the response cache; None disables caching."""
+    global response_cache
+    response_cache = cache
+
+
+def model_key(llm):
+    """Identify a model and its sampling parameters for cache keys."""
+    params = dict(llm._identifying_params)
+    # Streaming and non-streaming copies of a model give the same answers.
+    params.pop("stream", None)
+    params.pop("streaming", None)
+    return f"{llm._llm_type}:{json.dumps(params, sort_keys=True, default=str)}"
+
+
+def _chain_request(chain, inputs):
+    prompt = chain.prompt.format_prompt(**inputs).to_string()
+    # Similarity is judged on the inputs only; the shared template would dominate otherwise.
+    semantic_text = "\n".join(str(inputs[key]) for key in sorted(inputs))
+    return model_key(chain.llm), prompt, semantic_text
+
+
+def run_chain(chain, inputs, site):
+    """Run an LLMChain, answering from the response cache when possible."""
+    cache = response_cache
+    if cache is None:
+        return chain.run(inputs)
+    model, prompt, semantic_text = _chain_request(chain, inputs)
+    cached = cache.lookup(site, model, prompt, semantic_text)
+    if cached is not None:
+        return cached
+    response = chain.run(inputs)
+    cache.store(site, model, prompt, response, semantic_text)
+    return response
+
+
+async def arun_chain(chain, inputs, site):
+    """Async variant of run_chain."""
+    cache = response_cache
+    if cache is None:
+        return await chain.arun(inputs)
+    model, prompt, semantic_text = _chain_request(chain, inputs)
+    cached = cache.lookup(site, model, prompt, semantic_text)
+    if cached is not None:
+        return cached
+    response = await chain.arun(inputs)
+    cache.store(site, model, prompt, response, semantic_text)
+    return response
+
+
+class _TokenQueue(AsyncCallbackHandler):
+    """Collects streamed tokens from one chain run into an asyncio queue."""
+    def __init__(self):
+        self.queue = asyncio.Queue()
+
+    async def on_llm_new_token(self, token, **kwargs):
+        if token:
+            self.queue.put_nowait(token)
+
+
+async def astream_chain(chain, inputs, site):
+    """
+    Run an LLMChain on a streaming model and yield tokens as they arrive.
+
+    A cached response is yielded as a single chunk. The full response is
+    stored in the cache once the stream completes.
+    """
+    cache = response_cache
+    if cache is not None:
+        model, prompt, semantic_text = _chain_request(chain, inputs)
+        cached = cache.lookup(site, model, prompt, semantic_text)
+        if cached is not None:
+            yield cached
+            return
+    handler = _TokenQueue()
+    task = asyncio.ensure_future(chain.arun(inputs, callbacks=[handler]))
+    # A None sentinel marks the end, whether the run succeeded or failed.
+    task.add_done_callback(lambda _: handler.queue.put_nowait(None))
+    try:
+        while True:
+            token = await handler.queue.get()
+            if token is None:
+                break
+            yield token
+        response = await task
+    finally:
+        if not task.done():
+            task.cancel()
+    if cache is not None:
+        cache.store(site, model, prompt, response, semantic_text)
+
+
+def _agent_model(agent):
+    return model_key(agent.agent.llm_chain.llm)
+
+
+def run_agent(agent, query, site="dynamic_tool"):
+    """Run the stateless tool agent, answering from the response cache when possible."""
+    cache = response_cache
+    if cache is None:
+        return agent.run(query)
+    model = _agent_model(agent)
+    cached = cache.lookup(site, model, query, query)
+    if cached is not None:
+        return cached
+    response = agent.run(query)
+    cache.store(site, model, query, response, query)
+    return response
+
+
+async def arun_agent(agent, query, site="dynamic_tool"):
+    """Async variant of run_agent."""
+    cache = response_cache
+    if cache is None:
+        return await agent.arun(query)
+    model = _agent_model(agent)
+    cached = cache.lookup(site, model, query, query)
+    if cached is not None:
+        return cached
+    response = await agent.arun(query)
+    cache.store(site, model, query, response, query)
+    return response
+
+
+def get_http_session():
+    """
+    Return the shared aiohttp session used by the OpenAI client's async calls.
+
+    Without it openai creates and tears down a connection pool per request.
+    Must be called from a running event loop.
+    """
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        import aiohttp
+        _http_session = aiohttp.ClientSession()
+    return _http_session
+
+
+async def close_http_session():
+    """Close the shared aiohttp session if one was opened."""
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
+
+def clear():
+    """Drop the shared model, all cached components and cached responses."""
+    global _llm
+    with _lock:
+        _llm = None
+        _components.clear()
+    if response_cache is not None:
+        response_cache.clear()
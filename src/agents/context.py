@@ -0,0 +1,151 @@
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio for English text with OpenAI tokenizers.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Cheap token estimate used for budgeting; avoids running a tokenizer per turn."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def format_turn(query, response):
+    return f"Q: {query}\nA: {response}"
+
+
+class ConversationContext:
+    """
+    Token-budgeted prompt context maintained incrementally as turns are added.
+
+    Recent turns are kept verbatim while they fit in `max_tokens`. Older turns
+    are moved out of the window and, if a `summarizer` is given, folded into a
+    rolling summary on `executor` so compaction never runs on the request path.
+    Until a compaction finishes, the previous summary is used.
+    """
+    def __init__(self, max_tokens=1500, summarizer=None, executor=None, summary_max_tokens=None):
+        self.max_tokens = max_tokens
+        self.summary_max_tokens = summary_max_tokens or max_tokens // 4
+        self.summarizer = summarizer
+        self.executor = executor
+        self._lock = threading.Lock()
+        self._turns = deque()  # (formatted turn, tokens)
+        self._window_tokens = 0
+        self._summary = ""
+        self._evicted = []
+        self._compaction = None
+        self._rendered = None
+
+    @property
+    def summary(self):
+        return self._summary
+
+    @property
+    def tokens(self):
+        """Estimated tokens of the rendered context."""
+        with self._lock:
+            return self._window_tokens + estimate_tokens(self._summary) if self._summary else self._window_tokens
+
+    def add_turn(self, query, response):
+        """Append a turn and evict the oldest ones that no longer fit."""
+        text = format_turn(query, response)
+        with self._lock:
+            self._turns.append((text, estimate_tokens(text)))
+            self._window_tokens += self._turns[-1][1]
+            self._fit()
+            self._rendered = None
+        self._schedule_compaction()
+
+    def _fit(self):
+        summary_tokens = estimate_tokens(self._summary) if self._summary else 0
+        # Always keep the newest turn, even if it alone exceeds the budget.
+        while len(self._turns) > 1 and self._window_tokens + summary_tokens > self.max_tokens:
+            text, tokens = self._turns.popleft()
+            self._window_tokens -= tokens
+            self._evicted.append(text)
+
+    def render(self):
+        """Return the prompt context: rolling summary followed by recent turns."""
+        with self._lock:
+            if self._rendered is None:
+                window = "\n".join(text for text, _ in self._turns)
+                if self._summary:
+                    window = f"Summary of earlier conversation: {self._summary}\n{window}"
+                self._rendered = window
+            return self._rendered
+
+    def _schedule_compaction(self):
+        if self.summarizer is None:
+            with self._lock:
+                self._evicted.clear()
+            return
+        with self._lock:
+            if not self._evicted or self._compaction is not None:
+                return
+            evicted, self._evicted = self._evicted, []
+            previous = self._summary
+            if self.executor is None:
+                self._compaction = True
+            else:
+                self._compaction = self.executor.submit(self._compact, previous, evicted)
+                return
+        self._compact(previous, evicted)
+
+    def _compact(self, previous, evicted):
+        try:
+            summary = self.summarizer(previous, "\n".join(evicted)).strip()
+        except Exception as e:
+            logger.error(f"Context compaction failed: {e}")
+            summary = previous
+        max_chars = self.summary_max_tokens * CHARS_PER_TOKEN
+        with self._lock:
+            self._summary = summary[:max_chars]
+            self._compaction = None
+            self._fit()
+            self._rendered = None
+        # Turns evicted while this compaction ran are folded in next.
+        self._schedule_compaction()
+
+    def wait(self, timeout=None):
+        """Block until any in-flight compaction finishes (used by tests and shutdown)."""
+        while True:
+            with self._lock:
+                compaction = self._compaction
+            if compaction is None or compaction is True:
+                return
+            compaction.result(timeout)
+
+    def clear(self):
+        with self._lock:
+            self._turns.clear()
+            self._window_tokens = 0
+            self._summary = ""
+            self._evicted = []
+            self._rendered = None
+
+    def restore(self, turns, summary=""):
+        """
+        Rebuild the window from (query, response) pairs and a stored summary.
+
+        Only the newest turns that fit are formatted; older ones are assumed to
+        be covered by `summary` already.
+        """
+        kept = []
+        budget = self.max_tokens - (estimate_tokens(summary) if summary else 0)
+        used = 0
+        for query, response in reversed(turns):
+            text = format_turn(query, response)
+            tokens = estimate_tokens(text)
+            if kept and used + tokens > budget:
+                break
+            kept.append((text, tokens))
+            used += tokens
+        with self._lock:
+            self._turns = deque(reversed(kept))
+            self._window_tokens = used
+            self._summary = summary
+            self._evicted = []
+            self._rendered = None
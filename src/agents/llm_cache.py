@@ -0,0 +1,258 @@
+"""
+Response cache in front of the LLM chains.
+
+Two tiers:
+- exact: keyed on call site, model parameters and the fully rendered prompt;
+- semantic (optional): nearest neighbour over local embeddings of the chain
+  inputs, accepted above a cosine-similarity threshold.
+
+Both tiers evict by LRU and TTL. Entries evicted from the exact tier can
+spill to a SQLite file and are still found there until they expire.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+
+from src.utils.embeddings import HashingEmbedder
+
+
+class DiskSpill:
+    """SQLite key/value file holding entries evicted from the in-memory tier."""
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # Cache contents are disposable; skip fsyncs entirely.
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+
+    def get(self, key, now):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] < now:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            return row[0]
+
+    def put(self, key, value, expires_at):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ExactCache:
+    """LRU + TTL map from key to response, with an optional disk spill."""
+    def __init__(self, max_entries=10000, ttl_seconds=3600, spill=None, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.spill = spill
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] is not None and entry[1] < now:
+                    del self._entries[key]
+                else:
+                    self._entries.move_to_end(key)
+                    return entry[0]
+        if self.spill is not None:
+            value = self.spill.get(key, now)
+            if value is not None:
+                self.put(key, value)
+                return value
+        return None
+
+    def put(self, key, value, ttl_seconds=None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = self.clock() + ttl if ttl is not None else None
+        evicted = []
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False))
+        if self.spill is not None:
+            for old_key, (old_value, old_expires) in evicted:
+                self.spill.put(old_key, old_value, old_expires)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.spill is not None:
+            self.spill.clear()
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour cache over embeddings, one index per namespace.
+
+    Vectors live in a preallocated float32 matrix so a lookup is a single
+    matrix-vector product over the namespace's rows.
+    """
+    def __init__(self, threshold=0.95, max_entries=2000, ttl_seconds=3600,
+                 embedder=None, clock=time.time):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embedder = embedder or HashingEmbedder()
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._indexes = {}
+
+    def _index(self, namespace):
+        index = self._indexes.get(namespace)
+        if index is None:
+            index = {
+                "vectors": np.zeros((self.max_entries, self.embedder.dim), dtype=np.float32),
+                "values": [None] * self.max_entries,
+                "expires": np.full(self.max_entries, -np.inf),
+                "lru": OrderedDict(),  # row -> None, oldest first
+            }
+            self._indexes[namespace] = index
+        return index
+
+    def get(self, namespace, text):
+        vector = self.embedder.embed(text)
+        now = self.clock()
+        with self._lock:
+            index = self._indexes.get(namespace)
+            if index is None or not index["lru"]:
+                return None
+            # Rows are filled in order, so the first len(lru) rows are the live ones.
+            used = len(index["lru"])
+            scores = index["vectors"][:used] @ vector
+            scores[index["expires"][:used] < now] = -1.0
+            row = int(np.argmax(scores))
+            if scores[row] < self.threshold:
+                return None
+            index["lru"].move_to_end(row)
+            return index["values"][row]
+
+    def put(self, namespace, text, value, ttl_seconds=None):
+        vector = self.embedder.embed(text)
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            index = self._index(namespace)
+            lru = index["lru"]
+            if len(lru) < self.max_entries:
+                row = len(lru)
+            else:
+                row, _ = lru.popitem(last=False)
+            index["vectors"][row] = vector
+            index["values"][row] = value
+            index["expires"][row] = self.clock() + ttl if ttl is not None else np.inf
+            lru[row] = None
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+class LLMResponseCache:
+    """
+    Exact tier plus optional semantic tier, with hit-rate counters per call site.
+
+    `ttl_overrides` maps call site -> TTL seconds, e.g. to keep planning
+    decisions longer than free-form answers.
+    """
+    def __init__(self, exact=None, semantic=None, ttl_overrides=None):
+        self.exact = exact if exact is not None else ExactCache()
+        self.semantic = semantic
+        self.ttl_overrides = ttl_overrides or {}
+        self._lock = threading.Lock()
+        self._counters = defaultdict(lambda: {"exact_hits": 0, "semantic_hits": 0, "misses": 0})
+
+    @staticmethod
+    def make_key(site, model, prompt):
+        digest = hashlib.sha256(f"{site}\0{model}\0{prompt}".encode("utf-8")).hexdigest()
+        return f"{site}:{digest}"
+
+    def _count(self, site, field):
+        with self._lock:
+            self._counters[site][field] += 1
+
+    def lookup(self, site, model, prompt, semantic_text=None):
+        """Return a cached response or None. `semantic_text` enables the semantic tier."""
+        value = self.exact.get(self.make_key(site, model, prompt))
+        if value is not None:
+            self._count(site, "exact_hits")
+            return value
+        if self.semantic is not None and semantic_text is not None:
+            value = self.semantic.get(f"{site}\0{model}", semantic_text)
+            if value is not None:
+                self._count(site, "semantic_hits")
+                return value
+        self._count(site, "misses")
+        return None
+
+    def store(self, site, model, prompt, response, semantic_text=None):
+        ttl = self.ttl_overrides.get(site)
+        self.exact.put(self.make_key(site, model, prompt), response, ttl_seconds=ttl)
+        if self.semantic is not None and semantic_text is not None:
+            self.semantic.put(f"{site}\0{model}", semantic_text, response, ttl_seconds=ttl)
+
+    def clear(self):
+        self.exact.clear()
+        if self.semantic is not None:
+            self.semantic.clear()
+        with self._lock:
+            self._counters.clear()
+
+    def stats(self):
+        """Return counters and hit rate per call site."""
+        with self._lock:
+            result = {}
+            for site, counts in self._counters.items():
+                lookups = sum(counts.values())
+                hits = counts["exact_hits"] + counts["semantic_hits"]
+                result[site] = dict(counts, hit_rate=hits / lookups if lookups else 0.0)
+            return result
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build the cache from environment variables:
+        LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL_SECONDS, LLM_CACHE_PLANNING_TTL_SECONDS,
+        LLM_CACHE_SPILL_PATH and LLM_SEMANTIC_CACHE_THRESHOLD (semantic tier is
+        off unless set). LLM_CACHE_MAX_ENTRIES=0 disables caching.
+        """
+        max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+        if max_entries <= 0:
+            return None
+        ttl = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+        spill_path = os.getenv("LLM_CACHE_SPILL_PATH")
+        threshold = os.getenv("LLM_SEMANTIC_CACHE_THRESHOLD")
+        return cls(
+            exact=ExactCache(max_entries, ttl, spill=DiskSpill(spill_path) if spill_path else None),
+            semantic=SemanticCache(float(threshold), ttl_seconds=ttl) if threshold else None,
+            ttl_overrides={"planning": float(os.getenv("LLM_CACHE_PLANNING_TTL_SECONDS", str(24 * 3600)))},
+        )
@@ -1,51 +1,89 @@
 import logging
-from langchain.chains.llm import LLMChain
-from langchain.prompts import PromptTemplate
-from langchain.agents import initialize_agent, Tool
-from src.utils.helpers import fetch_product_data_tool, fetch_product_data
+import os
+from src.agents import chains
+from src.agents.context import ConversationContext, format_turn
+from src.utils.concurrency import get_executor
+from src.utils.helpers import fetch_product_data
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Estimated-token budget for the conversation context pasted into prompts.
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "1500"))
+
 class MemoryModule:
     """
     MemoryModule handles conversation history, recommendations, and dynamic tool execution.
     """
-    def __init__(self, llm):
+    def __init__(self, llm, context_max_tokens=CONTEXT_MAX_TOKENS):
         # Initialize conversation history and recommendation store.
         self.conversation_history = []
         self.recommendations = []
-        self.llm_chain = LLMChain(
-            llm=llm,
-            prompt=PromptTemplate(
-                input_variables=["query", "history"],
-                template=(
-                    "User query: {query}\n"
-                    "Conversation history: {history}\n"
-                    "Reason about the query and respond appropriately."
-                )
-            )
+        self.llm = llm
+        # Full transcript, extended per turn instead of re-joined on every call.
+        self._history_text = ""
+        self._history_len = 0
+        # Bounded prompt context; old turns are summarized off the request path.
+        self.context = ConversationContext(
+            max_tokens=context_max_tokens,
+            summarizer=self._summarize,
+            executor=get_executor()
         )
-        self.tools = [fetch_product_data_tool()]
-        self.agent = initialize_agent(
-            tools=self.tools,
-            llm=llm,
-            agent="zero-shot-react-description",
-            verbose=True
+
+    @property
+    def llm_chain(self):
+        """Reasoning chain shared by all sessions using this LLM."""
+        return chains.reasoning_chain(self.llm)
+
+    @property
+    def agent(self):
+        """Tool-using agent shared by all sessions using this LLM."""
+        return chains.tool_agent(self.llm)
+
+    @property
+    def tools(self):
+        return self.agent.tools
+
+    def _summarize(self, summary, lines):
+        return chains.run_chain(
+            chains.summary_chain(self.llm), {"summary": summary, "lines": lines}, site="summary"
         )
 
     def add_to_history(self, query, response):
         """Store a query-response pair into the conversation history."""
+        in_sync = self._history_len == len(self.conversation_history)
         self.conversation_history.append({"query": query, "response": response})
+        if in_sync:
+            turn = format_turn(query, response)
+            self._history_text = f"{self._history_text}\n{turn}" if self._history_text else turn
+            self._history_len += 1
+        self.context.add_turn(query, response)
 
     def get_history(self):
         """Return the conversation history as a formatted string."""
-        if not self.conversation_history:
-            return ""
-        return "\n".join(
-            f"Q: {item['query']}\nA: {item['response']}"
-            for item in self.conversation_history
-        )
+        if self._history_len != len(self.conversation_history):
+            # The list was changed directly; rebuild the cached transcript.
+            self._history_text = "\n".join(
+                format_turn(item["query"], item["response"])
+                for item in self.conversation_history
+            )
+            self._history_len = len(self.conversation_history)
+        return self._history_text
+
+    def get_context(self):
+        """Return the token-budgeted conversation context used in prompts."""
+        return self.context.render()
+
+    def clear_history(self):
+        """Forget the conversation history and its summary."""
+        self.conversation_history.clear()
+        self._history_text = ""
+        self._history_len = 0
+        self.context.clear()
+
+    def clear_recommendations(self):
+        """Forget past recommendations."""
+        self.recommendations.clear()
 
     def add_recommendation(self, recommendation):
         """Store the given recommendation."""
@@ -55,13 +93,33 @@ class MemoryModule:
         """Return the stored recommendations."""
         return self.recommendations
 
+    def snapshot(self):
+        """Return a copy of the history and recommendations for persistence."""
+        return {
+            "conversation_history": list(self.conversation_history),
+            "recommendations": list(self.recommendations),
+            "context_summary": self.context.summary,
+        }
+
+    def restore(self, state):
+        """Replace the history and recommendations with a stored snapshot."""
+        self.conversation_history = list(state.get("conversation_history", []))
+        self.recommendations = list(state.get("recommendations", []))
+        self._history_len = -1
+        self.context.restore(
+            [(item["query"], item["response"]) for item in self.conversation_history],
+            state.get("context_summary", "")
+        )
+
     def execute(self, plan, query=None):
         """
         Execute the plan and return the appropriate response.
         """
         if plan == "reasoning":
-            history = self.get_history()
-            response = self.llm_chain.run({"query": query, "history": history})
+            history = self.get_context()
+            response = chains.run_chain(
+                self.llm_chain, {"query": query, "history": history}, site="memory.reasoning"
+            )
             self.add_to_history(query, response)
             return response
 
@@ -83,7 +141,33 @@ class MemoryModule:
         if plan == "dynamic_tool":
             try:
                 logger.info(f"Executing dynamic tool with query: {query}")
-                response = self.agent.run(query)
+                response = chains.run_agent(self.agent, query)
+                self.add_to_history(query, response)
+                logger.info("Dynamic tool execution successful.")
+                return response
+            except Exception as e:
+                logger.error(f"Error in dynamic tool execution: {e}")
+                return "Sorry, an error occurred while processing your request."
+
+        return "How can I assist you further?"
+
+    async def aexecute(self, plan, query=None):
+        """
+        Async variant of execute. LLM-bound plans await the chain and agent
+        without blocking the event loop; the rest are cheap and run inline.
+        """
+        if plan == "reasoning":
+            history = self.get_context()
+            response = await chains.arun_chain(
+                self.llm_chain, {"query": query, "history": history}, site="memory.reasoning"
+            )
+            self.add_to_history(query, response)
+            return response
+
+        if plan == "dynamic_tool":
+            try:
+                logger.info(f"Executing dynamic tool with query: {query}")
+                response = await chains.arun_agent(self.agent, query)
                 self.add_to_history(query, response)
                 logger.info("Dynamic tool execution successful.")
                 return response
@@ -91,4 +175,4 @@ class MemoryModule:
                 logger.error(f"Error in dynamic tool execution: {e}")
                 return "Sorry, an error occurred while processing your request."
 
-        return "How can I assist you further?"
\ No newline at end of file
+        return self.execute(plan, query)
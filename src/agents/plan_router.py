@@ -0,0 +1,224 @@
+"""
+Tiered plan router in front of the PlanningModule's LLM call.
+
+Tier 1 is a handful of keyword rules, tier 2 a linear TF-IDF classifier
+trained offline from logged plans (see src/agents/train_plan_router.py).
+Both answer in microseconds; the LLM is only asked when neither is
+confident, and its free-form answer is normalized to a valid plan.
+"""
+import json
+import logging
+import os
+import pickle
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VALID_PLANS = ("reasoning", "recommendation", "history", "dynamic_tool")
+DEFAULT_PLAN = "reasoning"
+
+# (plan, confidence, pattern); the first matching rule wins.
+KEYWORD_RULES = [
+    ("history", 0.95, re.compile(
+        r"\b(conversation history|chat history|what did i (ask|say)|"
+        r"(previous|earlier|past) (questions?|messages?|conversation))\b", re.I)),
+    ("dynamic_tool", 0.9, re.compile(
+        r"\b(look up|search for|in stock|availability|price of|how much (is|does|are)|"
+        r"fetch|compare prices?)\b", re.I)),
+    ("recommendation", 0.9, re.compile(
+        r"\b(recommend\w*|suggest\w*|what should i (buy|get)|show me some)\b", re.I)),
+]
+
+_PLAN_ALIASES = [
+    ("dynamic_tool", re.compile(r"dynamic[\s_-]*tool", re.I)),
+    ("recommendation", re.compile(r"recommend", re.I)),
+    ("history", re.compile(r"history", re.I)),
+    ("reasoning", re.compile(r"reason", re.I)),
+]
+
+
+def normalize_plan(text, default=DEFAULT_PLAN):
+    """Map free-form model output such as 'Plan: Recommendation.' to a valid plan."""
+    cleaned = text.strip().lower().strip(" .'\"`*")
+    if cleaned in VALID_PLANS:
+        return cleaned
+    # Pick the alias that appears earliest in the text.
+    found = [(match.start(), plan) for plan, pattern in _PLAN_ALIASES
+             for match in [pattern.search(text)] if match]
+    return min(found)[1] if found else default
+
+
+class RouteDecision:
+    __slots__ = ("plan", "confidence", "source")
+
+    def __init__(self, plan, confidence, source):
+        self.plan = plan
+        self.confidence = confidence
+        self.source = source
+
+    def __repr__(self):
+        return f"RouteDecision({self.plan!r}, {self.confidence:.2f}, {self.source!r})"
+
+
+class KeywordRouter:
+    """Rule tier: fixed regular expressions for unambiguous intents."""
+    def __init__(self, rules=None):
+        self.rules = rules if rules is not None else KEYWORD_RULES
+
+    def route(self, query):
+        for plan, confidence, pattern in self.rules:
+            if pattern.search(query):
+                return RouteDecision(plan, confidence, "keyword")
+        return None
+
+
+class LinearTextClassifier:
+    """
+    TF-IDF + linear model evaluated with plain Python and NumPy.
+
+    Built from a fitted scikit-learn TfidfVectorizer/LogisticRegression pair
+    so serving needs neither scikit-learn nor its per-call overhead.
+    """
+    TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+    def __init__(self, vocabulary, idf, coef, intercept, classes, ngram_range=(1, 2)):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.coef = coef  # (n_terms, n_outputs)
+        self.intercept = intercept
+        self.classes = list(classes)
+        self.ngram_range = tuple(ngram_range)
+
+    @classmethod
+    def from_sklearn(cls, vectorizer, model):
+        return cls(
+            vocabulary=dict(vectorizer.vocabulary_),
+            idf=vectorizer.idf_.astype(np.float64),
+            coef=np.ascontiguousarray(model.coef_.T, dtype=np.float64),
+            intercept=model.intercept_.astype(np.float64),
+            classes=model.classes_,
+            ngram_range=vectorizer.ngram_range,
+        )
+
+    def _terms(self, text):
+        tokens = self.TOKEN_PATTERN.findall(text.lower())
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for i in range(len(tokens) - n + 1):
+                yield " ".join(tokens[i:i + n])
+
+    def predict_proba(self, text):
+        """Return {plan: probability}."""
+        counts = Counter(self.vocabulary[t] for t in self._terms(text) if t in self.vocabulary)
+        scores = self.intercept.copy()
+        if counts:
+            rows = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+            weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts)) * self.idf[rows]
+            weights /= np.linalg.norm(weights)
+            scores += weights @ self.coef[rows]
+        if scores.shape[0] == 1:
+            positive = 1.0 / (1.0 + np.exp(-scores[0]))
+            probs = np.array([1.0 - positive, positive])
+        else:
+            probs = np.exp(scores - scores.max())
+            probs /= probs.sum()
+        return dict(zip(self.classes, probs.tolist()))
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+
+class ClassifierRouter:
+    """Classifier tier wrapping a LinearTextClassifier."""
+    def __init__(self, classifier):
+        self.classifier = classifier
+
+    def route(self, query):
+        probs = self.classifier.predict_proba(query)
+        plan = max(probs, key=probs.get)
+        return RouteDecision(plan, probs[plan], "classifier")
+
+
+class PlanRouter:
+    """
+    Try each tier in order and accept the first decision at or above
+    `min_confidence`. Returns None when the LLM should decide.
+
+    With `log_path` set, every final decision is appended as a JSON line so
+    the classifier can be retrained from real traffic.
+    """
+    def __init__(self, tiers, min_confidence=0.75, log_path=None):
+        self.tiers = tiers
+        self.min_confidence = min_confidence
+        self.log_path = log_path
+        self._log_lock = threading.Lock()
+        self.counts = Counter()
+
+    def route(self, query):
+        for tier in self.tiers:
+            decision = tier.route(query)
+            if decision is not None and decision.confidence >= self.min_confidence:
+                self.counts[decision.source] += 1
+                return decision
+        return None
+
+    def record(self, query, plan, source):
+        """Count a decision and append it to the plan log if enabled."""
+        if source == "llm":
+            self.counts["llm"] += 1
+        if not self.log_path:
+            return
+        line = json.dumps({"query": query, "plan": plan, "source": source})
+        try:
+            with self._log_lock, open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.error(f"Could not write plan log: {e}")
+
+    def stats(self):
+        return dict(self.counts)
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build the router from PLAN_ROUTER_MODEL_PATH (optional trained classifier),
+        PLAN_ROUTER_MIN_CONFIDENCE and PLAN_LOG_PATH.
+        """
+        tiers = [KeywordRouter()]
+        model_path = os.getenv("PLAN_ROUTER_MODEL_PATH")
+        if model_path and os.path.exists(model_path):
+            tiers.append(ClassifierRouter(LinearTextClassifier.load(model_path)))
+        return cls(
+            tiers,
+            min_confidence=float(os.getenv("PLAN_ROUTER_MIN_CONFIDENCE", "0.75")),
+            log_path=os.getenv("PLAN_LOG_PATH"),
+        )
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router():
+    """Return the process-wide PlanRouter, built from the environment on first use."""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = PlanRouter.from_env()
+    return _router
+
+
+def set_router(router):
+    global _router
+    _router = router
@@ -1,31 +1,44 @@
-from langchain.chains import LLMChain
-from langchain.prompts.chat import ChatPromptTemplate, HumanMessagePromptTemplate
-from langchain.chat_models import ChatOpenAI
+from src.agents import chains
+from src.agents.plan_router import get_router, normalize_plan
 
 class PlanningModule:
-    def __init__(self, memory, profiling):
+    def __init__(self, memory, profiling, llm=None, router=None):
         self.memory = memory
         self.profiling = profiling
-        # Use the ChatOpenAI instance here.
-        self.llm = ChatOpenAI(model="gpt-4o")  # Use your chat model
-        # Create a ChatPromptTemplate for the planning chain.
-        chat_prompt = ChatPromptTemplate.from_messages([
-            HumanMessagePromptTemplate.from_template(
-                "User query: {query}\n"
-                "Conversation history: {history}\n"
-                "User profile: {profile}\n"
-                "Based on the above information, decide the best plan. Options: reasoning, recommendation, history, dynamic_tool."
-            )
-        ])
-        self.planning_chain = LLMChain(llm=self.llm, prompt=chat_prompt)
+        # Defaults to the process-wide chat model rather than a client per session.
+        self.llm = llm or chains.get_llm()
+        # Local rule/classifier tiers tried before the LLM (see plan_router.py).
+        self.router = router or get_router()
+
+    @property
+    def planning_chain(self):
+        return chains.planning_chain(self.llm)
+
+    def _inputs(self, query):
+        return {
+            "query": query,
+            "history": self.memory.get_context(),
+            "profile": self.profiling.get_profile()
+        }
 
     def plan(self, query):
-        history = self.memory.get_history()
-        profile = self.profiling.get_profile()
+        decision = self.router.route(query)
+        if decision is not None:
+            self.router.record(query, decision.plan, decision.source)
+            return decision.plan
         # Run the chain using the chat prompt
-        plan = self.planning_chain.run({
-            "query": query,
-            "history": history,
-            "profile": profile
-        })
-        return plan.strip()
\ No newline at end of file
+        plan = chains.run_chain(self.planning_chain, self._inputs(query), site="planning")
+        plan = normalize_plan(plan)
+        self.router.record(query, plan, "llm")
+        return plan
+
+    async def aplan(self, query):
+        """Async variant of plan that awaits the planning chain."""
+        decision = self.router.route(query)
+        if decision is not None:
+            self.router.record(query, decision.plan, decision.source)
+            return decision.plan
+        plan = await chains.arun_chain(self.planning_chain, self._inputs(query), site="planning")
+        plan = normalize_plan(plan)
+        self.router.record(query, plan, "llm")
+        return plan
@@ -33,4 +33,15 @@ class ProfilingModule:
             "name": None,
             "preferences": [],
             "interaction_count": 0
-        }
\ No newline at end of file
+        }
+
+    def snapshot(self):
+        """Return a copy of the profile for persistence."""
+        profile = dict(self.profile)
+        profile["preferences"] = list(profile.get("preferences", []))
+        return profile
+
+    def restore(self, profile):
+        """Replace the profile with a stored snapshot."""
+        self.clear_profile()
+        self.profile.update(profile)
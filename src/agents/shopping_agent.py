@@ -2,21 +2,20 @@ from src.agents.planning import PlanningModule
 from src.agents.action import ActionModule
 from src.agents.memory import MemoryModule
 from src.agents.profiling import ProfilingModule
-from langchain.chains import LLMChain
-from langchain.prompts import PromptTemplate
-from langchain.llms import OpenAI
+from src.agents import chains
 
 class ShoppingAssistant:
     def __init__(self):
-        # Initialize modules; MemoryModule and ActionModule require an LLM instance.
-        self.memory = MemoryModule(llm=self.initialize_llm())
+        # Initialize modules; all of them share a single LLM client.
+        llm = self.initialize_llm()
+        self.memory = MemoryModule(llm=llm)
         self.profiling = ProfilingModule()
-        self.planning = PlanningModule(memory=self.memory, profiling=self.profiling)
-        self.action = ActionModule(memory=self.memory, llm=self.initialize_llm())
+        self.planning = PlanningModule(memory=self.memory, profiling=self.profiling, llm=llm)
+        self.action = ActionModule(memory=self.memory, llm=llm)
 
     def initialize_llm(self):
-        """Initialize the LLM with the desired model."""
-        return OpenAI(model="gpt-4o")  # Replace with your preferred model
+        """Return the process-wide LLM client."""
+        return chains.get_llm()
 
     def respond(self, query, plan="reasoning"):
         """
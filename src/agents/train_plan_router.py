@@ -0,0 +1,70 @@
+"""
+Train the plan router's classifier tier from logged plans.
+
+The log is the JSON-lines file written by PlanRouter when PLAN_LOG_PATH is
+set; each line has "query", "plan" and "source". By default only decisions
+made by the LLM are used as labels, so the classifier learns to imitate it.
+
+Usage:
+    python -m src.agents.train_plan_router --log plans.jsonl --output plan_router.pkl
+"""
+import argparse
+import json
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import cross_val_score
+from sklearn.pipeline import make_pipeline
+
+from src.agents.plan_router import VALID_PLANS, LinearTextClassifier
+
+
+def load_plan_log(path, sources=("llm",)):
+    """Return (queries, plans) from a plan log, keeping valid plans from the given sources."""
+    queries, plans = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if sources and record.get("source") not in sources:
+                continue
+            if record.get("plan") in VALID_PLANS and record.get("query"):
+                queries.append(record["query"])
+                plans.append(record["plan"])
+    return queries, plans
+
+
+def train_classifier(queries, plans, ngram_range=(1, 2), C=10.0):
+    """Fit TF-IDF + logistic regression and return a LinearTextClassifier."""
+    if len(set(plans)) < 2:
+        raise ValueError("Need examples of at least two different plans to train the router.")
+    vectorizer = TfidfVectorizer(ngram_range=ngram_range)
+    model = LogisticRegression(C=C, max_iter=1000)
+    model.fit(vectorizer.fit_transform(queries), plans)
+    return LinearTextClassifier.from_sklearn(vectorizer, model)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", required=True, help="Plan log (JSON lines).")
+    parser.add_argument("--output", required=True, help="Where to write the trained classifier.")
+    parser.add_argument("--sources", default="llm", help="Comma-separated decision sources to learn from ('' for all).")
+    args = parser.parse_args(argv)
+
+    sources = tuple(s for s in args.sources.split(",") if s)
+    queries, plans = load_plan_log(args.log, sources)
+    print(f"Loaded {len(queries)} labelled queries.")
+    folds = min(5, min(plans.count(p) for p in set(plans))) if plans else 0
+    if folds >= 2:
+        pipeline = make_pipeline(TfidfVectorizer(ngram_range=(1, 2)), LogisticRegression(C=10.0, max_iter=1000))
+        scores = cross_val_score(pipeline, queries, plans, cv=folds)
+        print(f"Cross-validated accuracy: {scores.mean():.3f} (+/- {scores.std():.3f})")
+    classifier = train_classifier(queries, plans)
+    classifier.save(args.output)
+    print(f"Classifier saved to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,22 @@
+import asyncio
+import json
+import os
+
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 from uuid import uuid4
 
-from langchain.chat_models import ChatOpenAI
+import openai
+from src.agents import chains
 from src.agents.memory import MemoryModule
 from src.agents.action import ActionModule
 from src.agents.profiling import ProfilingModule
 from src.agents.planning import PlanningModule
+from src.agents.plan_router import get_router
+from src.api.persistence import SQLiteBackend
+from src.api.session_store import SessionStore
 
 app = FastAPI(
     title="Shopping Assistant API",
@@ -15,30 +24,95 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Create a global ChatOpenAI instance (shared across sessions)
-llm = ChatOpenAI(model="gpt-4o")  # Replace with your preferred chat model
-
-# Dictionary to store per-user sessions.
-user_sessions = {}
-
 class UserSession:
     """
     Container for per-user agent modules.
+
+    Only per-user state lives here; chains, agents and the LLM client are
+    process-wide (see src/agents/chains.py), so creating a session is cheap.
     """
     def __init__(self):
+        llm = chains.get_llm()
         self.memory = MemoryModule(llm)
         self.profiling = ProfilingModule()
-        self.planning = PlanningModule(memory=self.memory, profiling=self.profiling)
+        self.planning = PlanningModule(memory=self.memory, profiling=self.profiling, llm=llm)
         self.action = ActionModule(self.memory, llm)
 
+    def snapshot(self):
+        """Return the session's durable state as plain data."""
+        state = self.memory.snapshot()
+        state["profile"] = self.profiling.snapshot()
+        return state
+
+    def restore(self, state):
+        """Load durable state produced by snapshot()."""
+        self.memory.restore(state)
+        self.profiling.restore(state.get("profile", {}))
+
+def create_session_backend():
+    """
+    Build the persistence backend from the environment.
+    Persistence is off unless SESSION_DB_PATH is set.
+    """
+    path = os.getenv("SESSION_DB_PATH")
+    if not path:
+        return None
+    return SQLiteBackend(path, flush_interval=float(os.getenv("SESSION_FLUSH_SECONDS", "1.0")))
+
+# Bounded store of per-user sessions (LRU + idle TTL eviction).
+user_sessions = SessionStore(
+    factory=UserSession,
+    max_sessions=int(os.getenv("SESSION_MAX_COUNT", "10000")),
+    max_bytes=int(os.getenv("SESSION_MAX_BYTES", str(256 * 1024 * 1024))),
+    ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", "3600")),
+    backend=create_session_backend(),
+)
+
+# How often idle sessions are swept in the background.
+SESSION_SWEEP_SECONDS = 60
+
 def get_user_session(user_id: str) -> UserSession:
     """
     Retrieve the session for the given user_id.
     If the session doesn't exist, create a new one.
     """
-    if user_id not in user_sessions:
-        user_sessions[user_id] = UserSession()
-    return user_sessions[user_id]
+    return user_sessions.get_or_create(user_id)
+
+def find_user_session(user_id: str) -> Optional[UserSession]:
+    """
+    Retrieve the session for the given user_id without creating one.
+    Used by read-only endpoints so unknown ids don't allocate sessions.
+    """
+    return user_sessions.get(user_id)
+
+async def sweep_expired_sessions():
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_SECONDS)
+        user_sessions.evict_expired()
+
+@app.middleware("http")
+async def share_http_session(request, call_next):
+    # Route the OpenAI client's async calls through one pooled aiohttp session.
+    openai.aiosession.set(chains.get_http_session())
+    return await call_next(request)
+
+@app.on_event("startup")
+async def start_session_sweeper():
+    app.state.session_sweeper = asyncio.create_task(sweep_expired_sessions())
+
+@app.on_event("shutdown")
+async def stop_session_sweeper():
+    app.state.session_sweeper.cancel()
+
+@app.on_event("shutdown")
+async def close_session_backend():
+    # Flush write-behind state so a clean shutdown loses nothing.
+    if user_sessions.backend is not None:
+        user_sessions.backend.close()
+
+@app.on_event("shutdown")
+async def close_http_session():
+    await chains.close_http_session()
 
 # Request and Response Models
 class QueryRequest(BaseModel):
@@ -67,15 +141,16 @@ async def process_query(req: QueryRequest):
         user_query = req.query
         
         # Direct execution branch: get a direct reasoning response.
-        direct_response = session.action.execute(plan="reasoning", query=user_query)
+        direct_response = await session.action.aexecute(plan="reasoning", query=user_query)
         
         # Use PlanningModule to decide the best plan based on past interactions.
-        plan = session.planning.plan(user_query)
-        response_based_on_plan = session.action.execute(plan=plan, query=user_query)
+        plan = await session.planning.aplan(user_query)
+        response_based_on_plan = await session.action.aexecute(plan=plan, query=user_query)
         
         # Get product recommendations and conversation history.
-        recommendation = session.action.execute(plan="recommendation")
-        conversation_history = session.action.execute(plan="history")
+        recommendation = await session.action.aexecute(plan="recommendation")
+        conversation_history = await session.action.aexecute(plan="history")
+        user_sessions.touch(user_id)
         
         return QueryResponse(
             user_id=user_id,
@@ -88,9 +163,64 @@ async def process_query(req: QueryRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_query_events(user_id: str, session: UserSession, user_query: str):
+    """
+    Run the /query pipeline and yield SSE events as each stage completes.
+
+    `token` events carry incremental LLM output for a stage, `stage` events
+    carry each stage's full result, and `done` closes the stream.
+    """
+    try:
+        yield sse_event("start", {"user_id": user_id})
+
+        async def stream_stage(stage, plan):
+            chunks = []
+            async for chunk in session.action.astream(plan=plan, query=user_query):
+                chunks.append(chunk)
+                yield sse_event("token", {"stage": stage, "token": chunk})
+            yield sse_event("stage", {"stage": stage, "content": "".join(chunks)})
+
+        async for event in stream_stage("direct_response", "reasoning"):
+            yield event
+
+        plan = await session.planning.aplan(user_query)
+        yield sse_event("stage", {"stage": "plan", "content": plan})
+
+        async for event in stream_stage("response_based_on_plan", plan):
+            yield event
+
+        recommendation = await session.action.aexecute(plan="recommendation")
+        yield sse_event("stage", {"stage": "recommendation", "content": recommendation})
+
+        conversation_history = await session.action.aexecute(plan="history")
+        user_sessions.touch(user_id)
+        yield sse_event("done", {"user_id": user_id, "conversation_history": conversation_history})
+    except Exception as e:
+        yield sse_event("error", {"detail": str(e)})
+
+@app.post("/query/stream")
+async def process_query_stream(req: QueryRequest):
+    """
+    Streaming variant of /query using Server-Sent Events, so clients see the
+    first tokens of the direct response instead of waiting for the whole pipeline.
+    """
+    user_id = req.user_id or str(uuid4())
+    session = get_user_session(user_id)
+    return StreamingResponse(
+        stream_query_events(user_id, session, req.query),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/history/{user_id}")
 async def get_history(user_id: str):
-    session = get_user_session(user_id)
+    session = find_user_session(user_id)
+    if session is None:
+        return {"user_id": user_id, "conversation_history": "No conversation history found."}
     try:
         history = session.action.execute(plan="history")
         return {"user_id": user_id, "conversation_history": history}
@@ -105,20 +235,32 @@ async def update_profile(user_id: str, profile: ProfileUpdate):
             session.profiling.update_profile("name", profile.name)
         if profile.preferences is not None:
             session.profiling.update_profile("preferences", profile.preferences)
+        user_sessions.touch(user_id)
         return {"user_id": user_id, "message": "Profile updated", "profile": session.profiling.get_profile()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/reset/{user_id}")
 async def reset_memory(user_id: str):
-    session = get_user_session(user_id)
+    session = find_user_session(user_id)
+    if session is None:
+        return {"user_id": user_id, "message": "Memory has been reset."}
     try:
-        session.memory.conversation_history.clear()
-        session.memory.recommendations.clear()
+        session.memory.clear_history()
+        session.memory.clear_recommendations()
+        user_sessions.touch(user_id)
         return {"user_id": user_id, "message": "Memory has been reset."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/stats")
+async def get_stats():
+    return {
+        "sessions": user_sessions.stats(),
+        "llm_cache": chains.response_cache.stats() if chains.response_cache is not None else {},
+        "plan_router": get_router().stats(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("src.api.main_api:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,150 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SessionBackend:
+    """
+    Interface for durable session state.
+
+    State is the plain dict returned by UserSession.snapshot(). Implementations
+    decide when writes reach disk; `flush` forces pending writes out.
+    """
+    def load(self, user_id):
+        """Return the stored state for user_id, or None."""
+        raise NotImplementedError
+
+    def save(self, user_id, state):
+        """Record the latest state for user_id."""
+        raise NotImplementedError
+
+    def delete(self, user_id):
+        """Forget user_id."""
+        raise NotImplementedError
+
+    def flush(self):
+        """Write any pending changes."""
+
+    def close(self):
+        """Flush and release resources."""
+        self.flush()
+
+
+class SQLiteBackend(SessionBackend):
+    """
+    SQLite session backend with batched write-behind.
+
+    `save` only records the latest state in memory; a background thread writes
+    all pending sessions in one transaction every `flush_interval` seconds (or
+    sooner once `max_batch` sessions are pending). Repeated saves of a session
+    between flushes collapse into one row write. A crash loses at most the last
+    `flush_interval` seconds of writes.
+    """
+    def __init__(self, path, flush_interval=1.0, max_batch=500):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending = {}  # user_id -> state, or None for a delete
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self.writes = 0
+        self.flushes = 0
+
+        self._conn = self._connect()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "user_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._read_lock = threading.Lock()
+        self._writer = threading.Thread(target=self._run, name="session-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL only fsyncs at checkpoints; durability is bounded by the flush window anyway.
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def load(self, user_id):
+        with self._pending_lock:
+            if user_id in self._pending:
+                return self._pending[user_id]
+        with self._read_lock:
+            row = self._conn.execute(
+                "SELECT state FROM sessions WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, user_id, state):
+        with self._pending_lock:
+            self._pending[user_id] = state
+            full = len(self._pending) >= self.max_batch
+        if full:
+            self._wake.set()
+
+    def delete(self, user_id):
+        self.save(user_id, None)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            now = time.time()
+            upserts = [
+                (user_id, json.dumps(state), now)
+                for user_id, state in batch.items() if state is not None
+            ]
+            deletes = [(user_id,) for user_id, state in batch.items() if state is None]
+            with self._read_lock:
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.executemany(
+                        "INSERT INTO sessions (user_id, state, updated_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT(user_id) DO UPDATE SET state = excluded.state, "
+                        "updated_at = excluded.updated_at",
+                        upserts
+                    )
+                    self._conn.executemany("DELETE FROM sessions WHERE user_id = ?", deletes)
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    # Put the batch back unless newer state arrived meanwhile.
+                    with self._pending_lock:
+                        for user_id, state in batch.items():
+                            self._pending.setdefault(user_id, state)
+                    raise
+            self.writes += len(batch)
+            self.flushes += 1
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Session write-behind flush failed: {e}")
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._writer.join()
+        self.flush()
+        self._conn.close()
+
+    def stats(self):
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {"pending": pending, "writes": self.writes, "flushes": self.flushes}
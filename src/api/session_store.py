@@ -0,0 +1,201 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Rough per-session overhead of the module objects and containers.
+SESSION_BASE_BYTES = 2048
+
+
+def approximate_session_size(session):
+    """
+    Estimate the bytes held by a session's conversation, recommendations and profile.
+
+    This is an accounting figure for eviction decisions, not an exact measurement.
+    """
+    size = SESSION_BASE_BYTES
+    for item in session.memory.conversation_history:
+        size += sys.getsizeof(item["query"]) + sys.getsizeof(item["response"]) + 64
+    for recommendation in session.memory.recommendations:
+        size += sys.getsizeof(recommendation) + sum(sys.getsizeof(r) for r in recommendation)
+    for value in session.profiling.get_profile().values():
+        size += sys.getsizeof(value)
+    return size
+
+
+class SessionStore:
+    """
+    Bounded map of user_id -> session with LRU and idle-TTL eviction.
+
+    The store caps both the number of sessions and their approximate total size.
+    Least recently used sessions are evicted first, and sessions idle for longer
+    than `ttl_seconds` are dropped on access or during `evict_expired`.
+
+    With a `backend` (see src/api/persistence.py), `touch` also persists the
+    session's snapshot, and a lookup that misses memory rehydrates the session
+    from the backend, so eviction never loses state.
+    """
+    def __init__(self, factory, max_sessions=10000, max_bytes=256 * 1024 * 1024,
+                 ttl_seconds=3600, size_fn=approximate_session_size, clock=time.monotonic,
+                 backend=None):
+        self.factory = factory
+        self.backend = backend
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.size_fn = size_fn
+        self.clock = clock
+        self._lock = threading.RLock()
+        # user_id -> [session, last_access, size]
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rehydrations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, user_id):
+        return user_id in self._entries
+
+    @property
+    def bytes(self):
+        return self._bytes
+
+    def _expired(self, entry, now):
+        return self.ttl_seconds is not None and now - entry[1] > self.ttl_seconds
+
+    def _remove(self, user_id):
+        entry = self._entries.pop(user_id)
+        self._bytes -= entry[2]
+        return entry
+
+    def get(self, user_id):
+        """Return the session for user_id, or None without creating one."""
+        with self._lock:
+            now = self.clock()
+            entry = self._entries.get(user_id)
+            if entry is not None and self._expired(entry, now):
+                self._remove(user_id)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return self._rehydrate(user_id)
+            self.hits += 1
+            entry[1] = now
+            self._entries.move_to_end(user_id)
+            return entry[0]
+
+    def _rehydrate(self, user_id):
+        if self.backend is None:
+            return None
+        state = self.backend.load(user_id)
+        if state is None:
+            return None
+        session = self.factory()
+        session.restore(state)
+        self._insert(user_id, session)
+        self.rehydrations += 1
+        return session
+
+    def get_or_create(self, user_id):
+        """Return the session for user_id, creating it if needed."""
+        with self._lock:
+            session = self.get(user_id)
+            if session is None:
+                session = self.factory()
+                self.put(user_id, session)
+            return session
+
+    def put(self, user_id, session):
+        """Insert or replace a session, persist it and enforce the limits."""
+        with self._lock:
+            self._insert(user_id, session)
+            if self.backend is not None:
+                self.backend.save(user_id, session.snapshot())
+
+    def _insert(self, user_id, session):
+        with self._lock:
+            if user_id in self._entries:
+                self._remove(user_id)
+            size = self.size_fn(session)
+            self._entries[user_id] = [session, self.clock(), size]
+            self._bytes += size
+            self._enforce_limits(keep=user_id)
+
+    def touch(self, user_id):
+        """
+        Record that a session was mutated: persist it, re-measure it and
+        enforce the byte limit.
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            if self.backend is not None:
+                self.backend.save(user_id, entry[0].snapshot())
+            size = self.size_fn(entry[0])
+            self._bytes += size - entry[2]
+            entry[2] = size
+            entry[1] = self.clock()
+            self._entries.move_to_end(user_id)
+            self._enforce_limits(keep=user_id)
+
+    def pop(self, user_id):
+        """Remove and return a session, or None if absent."""
+        with self._lock:
+            if user_id not in self._entries:
+                return None
+            return self._remove(user_id)[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def evict_expired(self):
+        """Drop every session idle for longer than the TTL. Returns the count removed."""
+        if self.ttl_seconds is None:
+            return 0
+        with self._lock:
+            now = self.clock()
+            expired = [uid for uid, entry in self._entries.items() if self._expired(entry, now)]
+            for user_id in expired:
+                self._remove(user_id)
+            self.expirations += len(expired)
+            return len(expired)
+
+    def _enforce_limits(self, keep=None):
+        # Oldest entries sit at the front of the OrderedDict.
+        while self._entries and (
+            len(self._entries) > self.max_sessions or self._bytes > self.max_bytes
+        ):
+            user_id = next(iter(self._entries))
+            if user_id == keep:
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(user_id)
+                continue
+            self._remove(user_id)
+            self.evictions += 1
+
+    def stats(self):
+        """Return counters and current occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "sessions": len(self._entries),
+                "bytes": self._bytes,
+                "max_sessions": self.max_sessions,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "rehydrations": self.rehydrations,
+            }
@@ -0,0 +1,32 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Upper bound on threads used for blocking work called from async code.
+MAX_BLOCKING_WORKERS = int(os.getenv("MAX_BLOCKING_WORKERS", "8"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the process-wide bounded executor for blocking calls."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=MAX_BLOCKING_WORKERS,
+                    thread_name_prefix="blocking"
+                )
+    return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Run a synchronous callable on the bounded executor without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
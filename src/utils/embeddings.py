@@ -0,0 +1,38 @@
+import numpy as np
+
+# Knuth's multiplicative hashing constant (2^32 / golden ratio).
+_HASH_MULTIPLIER = np.uint64(2654435761)
+
+
+class HashingEmbedder:
+    """
+    Local, deterministic text embeddings from hashed character trigrams.
+
+    No model download or network access is needed, and the same text always
+    maps to the same L2-normalized float32 vector across processes.
+    """
+    def __init__(self, dim=1024, lowercase=True):
+        self.dim = dim
+        self.lowercase = lowercase
+
+    def embed(self, text):
+        """Return a (dim,) float32 unit vector for text."""
+        if self.lowercase:
+            text = text.lower()
+        data = np.frombuffer(f" {text} ".encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if data.size >= 3:
+            trigrams = (data[:-2] << np.uint64(16)) | (data[1:-1] << np.uint64(8)) | data[2:]
+            buckets = ((trigrams * _HASH_MULTIPLIER) >> np.uint64(7)) % np.uint64(self.dim)
+            vector += np.bincount(buckets.astype(np.intp), minlength=self.dim).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector
+
+    def embed_many(self, texts):
+        """Return an (n, dim) float32 matrix, one row per text."""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            matrix[row] = self.embed(text)
+        return matrix
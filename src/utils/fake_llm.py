@@ -0,0 +1,57 @@
+import asyncio
+import re
+import time
+from typing import Any, List, Optional
+
+from langchain.chat_models.base import SimpleChatModel
+from langchain.schema import AIMessage, BaseMessage, ChatGeneration, ChatResult
+
+
+class FakeChatModel(SimpleChatModel):
+    """
+    Deterministic offline chat model for tests and benchmarks.
+
+    Every call returns `response` after `latency` seconds. The async path sleeps
+    with asyncio so concurrent calls overlap the same way real network calls do.
+    `calls` counts upstream calls. With `streaming`, the async path also emits
+    the response word by word through the callback manager, like ChatOpenAI.
+    """
+    response: str = "Final Answer: This is a fake response."
+    latency: float = 0.0
+    streaming: bool = False
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self):
+        return {"response": self.response}
+
+    def _call(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.response
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.streaming and run_manager:
+            for token in re.findall(r"\S+\s*", self.response):
+                await run_manager.on_llm_new_token(token)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.response))])
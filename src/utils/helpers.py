@@ -1,4 +1,5 @@
 from langchain.tools import Tool
+from src.utils.concurrency import run_blocking
 
 def fetch_product_data(preferences):
     """Mock function to fetch product data based on preferences.
@@ -12,10 +13,15 @@ def fetch_product_data(preferences):
     # Replace this with actual logic to fetch product data based on preferences.
     return ["Product A", "Product B", "Product C"]
 
+async def afetch_product_data(preferences):
+    """Async variant of fetch_product_data, run on the bounded blocking executor."""
+    return await run_blocking(fetch_product_data, preferences)
+
 def fetch_product_data_tool():
     """Define a tool for fetching product data."""
     return Tool(
         name="fetch_product_data",
         func=fetch_product_data,
+        coroutine=afetch_product_data,
         description="Fetch product data based on user preferences."
-    )
\ No newline at end of file
+    )
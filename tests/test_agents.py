@@ -1,4 +1,16 @@
+import asyncio
+import time
 from src.agents.shopping_agent import ShoppingAssistant
+from src.agents.action import ActionModule
+from src.agents import chains
+from src.agents.llm_cache import DiskSpill, ExactCache, LLMResponseCache, SemanticCache
+from src.agents.plan_router import KeywordRouter, PlanRouter, ClassifierRouter, normalize_plan
+from src.agents.train_plan_router import load_plan_log, train_classifier
+from src.agents.context import ConversationContext, estimate_tokens
+from src.agents.memory import MemoryModule
+from src.agents.planning import PlanningModule
+from src.agents.profiling import ProfilingModule
+from src.utils.fake_llm import FakeChatModel
 import pytest
 
 def test_shopping_agent_reasoning():
@@ -92,4 +104,180 @@ def test_shopping_agent_memory_persistence():
     assistant.respond("What are the best smartphones?", plan="reasoning")  # Add another query
     response2 = assistant.respond(plan="history")
     # Verify that both queries are present in the history.
-    assert "laptops" in response2.lower() and "smartphones" in response2.lower(), "History should include both 'laptops' and 'smartphones'."
\ No newline at end of file
+    assert "laptops" in response2.lower() and "smartphones" in response2.lower(), "History should include both 'laptops' and 'smartphones'."
+
+def test_action_aexecute_runs_concurrently():
+    """
+    Test that async reasoning calls overlap instead of serializing.
+    """
+    llm = FakeChatModel(response="Async answer.", latency=0.2)
+    actions = [ActionModule(MemoryModule(llm), llm) for _ in range(5)]
+
+    async def run_all():
+        return await asyncio.gather(
+            *(action.aexecute(plan="reasoning", query="What are the best laptops?") for action in actions)
+        )
+
+    start = time.perf_counter()
+    responses = asyncio.run(run_all())
+    elapsed = time.perf_counter() - start
+    assert responses == ["Async answer."] * 5
+    assert elapsed < 0.6, f"Five concurrent calls took {elapsed:.2f}s; expected them to overlap."
+    assert "laptops" in actions[0].memory.get_history()
+
+def test_memory_aexecute_dynamic_tool():
+    """
+    Test that the dynamic tool agent runs through the async path.
+    """
+    llm = FakeChatModel(response="Final Answer: Try the budget phone.")
+    memory = MemoryModule(llm)
+    action = ActionModule(memory, llm)
+    response = asyncio.run(action.aexecute(plan="dynamic_tool", query="Find me a budget-friendly smartphone."))
+    assert response == "Try the budget phone."
+    assert "budget-friendly smartphone" in memory.get_history()
+
+def test_sessions_share_chains_and_agent():
+    """
+    Test that per-session modules reuse process-wide chains and agents.
+    """
+    llm = FakeChatModel()
+    memory_a, memory_b = MemoryModule(llm), MemoryModule(llm)
+    assert memory_a.llm_chain is memory_b.llm_chain
+    assert memory_a.agent is memory_b.agent
+    assert ActionModule(memory_a, llm).llm_chain is memory_a.llm_chain
+
+    planning_a = PlanningModule(memory_a, ProfilingModule(), llm=llm)
+    planning_b = PlanningModule(memory_b, ProfilingModule(), llm=llm)
+    assert planning_a.planning_chain is planning_b.planning_chain
+
+    # State stays per session.
+    memory_a.add_to_history("q", "a")
+    assert memory_b.get_history() == ""
+
+def test_conversation_context_stays_within_budget():
+    """
+    Test that the prompt context stays bounded while the full history grows.
+    """
+    memory = MemoryModule(FakeChatModel(response="Shopper wants laptops."), context_max_tokens=200)
+    for i in range(100):
+        memory.add_to_history(f"Question {i} about laptops?", "An answer about laptops. " * 5)
+    memory.context.wait()
+    assert estimate_tokens(memory.get_context()) <= 200
+    assert "Question 99" in memory.get_context()
+    assert "Question 0" not in memory.get_context()
+    assert memory.context.summary == "Shopper wants laptops."
+    # The full transcript is unchanged.
+    assert memory.get_history().count("Q: ") == 100
+
+def test_conversation_context_rolling_summary():
+    """
+    Test that evicted turns are passed to the summarizer with the previous summary.
+    """
+    calls = []
+    def summarizer(summary, lines):
+        calls.append((summary, lines))
+        return f"{summary}|{lines.count('Q:')}"
+    context = ConversationContext(max_tokens=30, summarizer=summarizer)
+    for i in range(5):
+        context.add_turn(f"query {i}", "a fairly long answer " * 2)
+    assert calls[0] == ("", "Q: query 0\nA: " + "a fairly long answer " * 2)
+    assert context.render().startswith("Summary of earlier conversation: ")
+    context.clear()
+    assert context.render() == ""
+
+def test_memory_clear_history_resets_context():
+    """
+    Test that clearing memory also clears the cached transcript and context.
+    """
+    memory = MemoryModule(FakeChatModel())
+    memory.add_to_history("What are the best laptops?", "This one.")
+    memory.clear_history()
+    assert memory.get_history() == ""
+    assert memory.get_context() == ""
+
+def test_llm_cache_exact_hits_skip_the_model():
+    """
+    Test that identical prompts are answered from the cache.
+    """
+    llm = FakeChatModel(response="Cached answer.")
+    chains.set_response_cache(LLMResponseCache())
+    try:
+        memories = [MemoryModule(llm) for _ in range(3)]
+        responses = [memory.execute("reasoning", "Recommend a laptop") for memory in memories]
+        assert responses == ["Cached answer."] * 3
+        assert llm.calls == 1
+        stats = chains.response_cache.stats()["memory.reasoning"]
+        assert stats["exact_hits"] == 2 and stats["misses"] == 1
+    finally:
+        chains.set_response_cache(LLMResponseCache.from_env())
+
+def test_exact_cache_ttl_and_disk_spill(tmp_path):
+    """
+    Test TTL expiry and that LRU-evicted entries are served from the spill file.
+    """
+    now = [0.0]
+    cache = ExactCache(max_entries=1, ttl_seconds=10, spill=DiskSpill(str(tmp_path / "spill.db")),
+                       clock=lambda: now[0])
+    cache.put("a", "A")
+    cache.put("b", "B")  # evicts "a" to disk
+    assert len(cache) == 1
+    assert cache.get("a") == "A"
+    now[0] = 11
+    assert cache.get("a") is None and cache.get("b") is None
+
+def test_semantic_cache_threshold():
+    """
+    Test that near-duplicate inputs hit and unrelated inputs miss.
+    """
+    cache = LLMResponseCache(semantic=SemanticCache(threshold=0.9))
+    cache.store("planning", "m", "prompt 1", "recommendation", semantic_text="Recommend a laptop under $1000")
+    assert cache.lookup("planning", "m", "prompt 2", semantic_text="recommend a laptop under 1000") == "recommendation"
+    assert cache.lookup("planning", "m", "prompt 3", semantic_text="Where is my refund?") is None
+    assert cache.lookup("planning", "other-model", "prompt 2", semantic_text="recommend a laptop under 1000") is None
+    assert cache.stats()["planning"]["semantic_hits"] == 1
+
+def test_normalize_plan():
+    """
+    Test that free-form planner output maps onto a valid plan.
+    """
+    assert normalize_plan("recommendation") == "recommendation"
+    assert normalize_plan("The best plan is: Dynamic Tool.") == "dynamic_tool"
+    assert normalize_plan("I'd suggest the history plan, then a recommendation") == "history"
+    assert normalize_plan("No idea") == "reasoning"
+
+def test_plan_router_skips_llm_when_confident():
+    """
+    Test that keyword and classifier tiers decide without calling the LLM.
+    """
+    queries = ["is this laptop good for gaming", "explain the difference between oled and lcd",
+               "find a cheap phone case", "get me usb cables under 10 dollars"] * 5
+    plans = ["reasoning", "reasoning", "dynamic_tool", "dynamic_tool"] * 5
+    router = PlanRouter([KeywordRouter(), ClassifierRouter(train_classifier(queries, plans))], min_confidence=0.6)
+    llm = FakeChatModel(response="Plan: Recommendation.")
+    planning = PlanningModule(MemoryModule(llm), ProfilingModule(), llm=llm, router=router)
+
+    assert planning.plan("Can you recommend a laptop?") == "recommendation"
+    assert planning.plan("Show me my conversation history") == "history"
+    assert planning.plan("find a cheap laptop case") == "dynamic_tool"
+    assert llm.calls == 0
+    # Nothing confident: the LLM decides and its answer is normalized.
+    assert planning.plan("hello there") == "recommendation"
+    assert llm.calls == 1
+    assert router.stats() == {"keyword": 2, "classifier": 1, "llm": 1}
+
+def test_train_plan_router_from_log(tmp_path):
+    """
+    Test that logged LLM decisions train a classifier that can be saved and reloaded.
+    """
+    log_path = tmp_path / "plans.jsonl"
+    router = PlanRouter([], log_path=str(log_path))
+    for _ in range(3):
+        router.record("what is a good budget for a tv", "reasoning", "llm")
+        router.record("look for running shoes size 10", "dynamic_tool", "llm")
+        router.record("recommend a laptop", "recommendation", "keyword")
+    queries, plans = load_plan_log(str(log_path))
+    assert len(queries) == 6 and "recommendation" not in plans
+    classifier = train_classifier(queries, plans)
+    classifier.save(str(tmp_path / "router.pkl"))
+    reloaded = ClassifierRouter(classifier.load(str(tmp_path / "router.pkl")))
+    assert reloaded.route("running shoes size 9").plan == "dynamic_tool"
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import pytest
+from src.agents import chains
+from src.api import main_api
+from src.api.persistence import SQLiteBackend
+from src.api.session_store import SessionStore
+from src.utils.fake_llm import FakeChatModel
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def fake_llm():
+    """
+    Fixture that routes all shared chains through an offline fake model.
+    """
+    llm = FakeChatModel(response="reasoning")
+    chains.set_llm(llm)
+    main_api.user_sessions.clear()
+    yield llm
+    chains.clear()
+    main_api.user_sessions.clear()
+
+def test_session_store_lru_eviction():
+    """
+    Test that the least recently used session is evicted at capacity.
+    """
+    store = SessionStore(factory=object, max_sessions=2, size_fn=lambda s: 1)
+    store.get_or_create("a")
+    store.get_or_create("b")
+    store.get("a")  # "b" is now the least recently used
+    store.get_or_create("c")
+    assert "a" in store and "c" in store and "b" not in store
+    assert store.stats()["evictions"] == 1
+
+def test_session_store_byte_limit():
+    """
+    Test that the approximate byte budget is enforced on touch.
+    """
+    sizes = {}
+    store = SessionStore(factory=object, max_bytes=100, size_fn=lambda s: sizes.get(id(s), 10))
+    first = store.get_or_create("a")
+    store.get_or_create("b")
+    sizes[id(first)] = 95
+    store.touch("a")
+    assert "a" in store and "b" not in store
+    assert store.bytes == 95
+
+def test_session_store_ttl_and_counters():
+    """
+    Test idle expiry and the hit/miss counters.
+    """
+    clock = FakeClock()
+    store = SessionStore(factory=object, ttl_seconds=10, size_fn=lambda s: 1, clock=clock)
+    store.get_or_create("a")
+    assert store.get("a") is not None
+    clock.now = 11
+    assert store.get("a") is None
+    stats = store.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["expirations"] == 1
+
+def test_read_only_endpoints_do_not_create_sessions(fake_llm):
+    """
+    Test that /history and /reset for unknown ids leave the store empty.
+    """
+    history = asyncio.run(main_api.get_history("unknown-user"))
+    assert "no conversation history found" in history["conversation_history"].lower()
+    asyncio.run(main_api.reset_memory("unknown-user"))
+    assert len(main_api.user_sessions) == 0
+
+def test_query_creates_and_reuses_session(fake_llm):
+    """
+    Test that /query creates a session once and /history then reads it.
+    """
+    req = main_api.QueryRequest(user_id="user-1", query="Can you recommend a laptop?")
+    response = asyncio.run(main_api.process_query(req))
+    assert response.plan == "recommendation"
+    history = asyncio.run(main_api.get_history("user-1"))
+    assert "laptop" in history["conversation_history"]
+    assert len(main_api.user_sessions) == 1
+
+def test_sqlite_backend_write_behind(tmp_path):
+    """
+    Test that saves are visible immediately and durable after a flush.
+    """
+    path = str(tmp_path / "sessions.db")
+    backend = SQLiteBackend(path, flush_interval=60)
+    backend.save("user-1", {"conversation_history": [{"query": "q", "response": "a"}]})
+    assert backend.load("user-1")["conversation_history"][0]["query"] == "q"
+    assert backend.stats()["pending"] == 1
+    backend.close()
+
+    reopened = SQLiteBackend(path, flush_interval=60)
+    assert reopened.load("user-1")["conversation_history"][0]["response"] == "a"
+    reopened.delete("user-1")
+    reopened.flush()
+    assert reopened.load("user-1") is None
+    reopened.close()
+
+def test_evicted_session_is_rehydrated(fake_llm, tmp_path):
+    """
+    Test that a session evicted from memory comes back from the backend.
+    """
+    backend = SQLiteBackend(str(tmp_path / "sessions.db"), flush_interval=60)
+    store = SessionStore(factory=main_api.UserSession, max_sessions=1, backend=backend)
+    session = store.get_or_create("user-1")
+    session.memory.add_to_history("What are the best laptops?", "This one.")
+    session.profiling.add_preference("gaming")
+    store.touch("user-1")
+    store.get_or_create("user-2")  # evicts user-1
+    assert "user-1" not in store
+
+    restored = store.get("user-1")
+    assert "laptops" in restored.memory.get_history()
+    assert restored.profiling.get_profile()["preferences"] == ["gaming"]
+    assert store.stats()["rehydrations"] == 1
+    assert store.get("never-seen") is None
+    backend.close()
+
+def read_sse(response):
+    """
+    Collect (event, data) pairs from a StreamingResponse body.
+    """
+    async def collect():
+        return [chunk async for chunk in response.body_iterator]
+    events = []
+    for chunk in asyncio.run(collect()):
+        event, data = chunk.strip().split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+def test_query_stream_sends_tokens_and_stages(fake_llm):
+    """
+    Test that /query/stream streams tokens per stage and records history at the end.
+    """
+    chains.set_llm(FakeChatModel(response="A reasoned answer about laptops."))
+    req = main_api.QueryRequest(user_id="user-1", query="Which laptop is lighter?")
+    events = read_sse(asyncio.run(main_api.process_query_stream(req)))
+
+    names = [name for name, _ in events]
+    assert names[0] == "start" and names[-1] == "done"
+    tokens = [data["token"] for name, data in events if name == "token" and data["stage"] == "direct_response"]
+    assert len(tokens) > 1 and "".join(tokens) == "A reasoned answer about laptops."
+    stages = {data["stage"]: data["content"] for name, data in events if name == "stage"}
+    assert stages["plan"] == "reasoning"
+    assert "recommendations" in stages["recommendation"]
+    assert events[-1][1]["conversation_history"].count("Which laptop is lighter?") == 2